@@ -1,23 +1,34 @@
 import asyncio
-import hashlib
+import contextlib
+import functools
 import logging
 import os
 import random
-from urllib.parse import urlparse
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import yt_dlp
+from yt_dlp.downloader.external import Aria2cFD, get_external_downloader
 from dotenv import load_dotenv
-from telegram import Update, Bot, InputMediaDocument, InputMediaAudio
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram import Update, Bot, InputMediaDocument, InputMediaAudio, InputFile, Message
+from telegram.error import RetryAfter, TelegramError
+from telegram.ext import AIORateLimiter, Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.request import HTTPXRequest
 
 load_dotenv()
 
 # Configuração do logging
+LOG_LEVEL = logging.getLevelNamesMapping().get(os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.DEBUG
+    level=LOG_LEVEL
 )
+# Bibliotecas que registram uma linha por requisição/bloco HTTP durante os uploads
+for noisy_logger in ("httpx", "httpcore", "telegram.ext"):
+    logging.getLogger(noisy_logger).setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 file_handler = logging.FileHandler('bot.log')
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
@@ -27,6 +38,7 @@ logger.addHandler(file_handler)
 MAX_PREMIUM_PARTS = 4000  # Valor hipotético, ajustar conforme config
 MAX_REGULAR_PARTS = 2000  # Valor hipotético, ajustar conforme config
 PART_SIZE = 524288  # 512KB
+STREAM_BUFFER_SIZE = 1024 * 1024  # 1MB
 BIG_FILE_THRESHOLD = 10 * 1024 * 1024  # 10MB
 
 # Configurações
@@ -34,6 +46,11 @@ TOKEN = os.getenv("TELEGRAM_TOKEN")  # Mantenha assim, mas confira o nome da var
 DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 2 * 1024 * 1024 * 1024))  # 2GB
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "/nix/var/nix/profiles/default/bin/ffmpeg")
+ARIA2C_PATH = os.getenv("ARIA2C_PATH")  # Opcional: só usa o aria2c se configurado explicitamente
+if ARIA2C_PATH and (get_external_downloader(ARIA2C_PATH) is not Aria2cFD or not shutil.which(ARIA2C_PATH)):
+    # Um valor não reconhecido pelo yt-dlp quebraria todos os downloads HTTP; melhor ignorar
+    logger.warning(f"ARIA2C_PATH inválido ({ARIA2C_PATH}), usando o downloader nativo do yt-dlp")
+    ARIA2C_PATH = None
 
 if not TOKEN:
     logger.error("Telegram bot token not configured.")
@@ -42,31 +59,84 @@ if not TOKEN:
 DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", os.path.join("/tmp", "downloads"))  # Usando /tmp
 
 TIMEOUT_SECONDS = 1000  # 16 minutos
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))  # Pedidos processados simultaneamente
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "16"))  # Partes enviadas simultaneamente
+
+# Pool próprio para o yt-dlp: cada download ocupa uma thread por minutos, e no pool padrão do asyncio
+# (min(32, cpu+4) threads) bloquearia as leituras de partes e a limpeza de arquivos dos outros pedidos
+_DOWNLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=CONCURRENT_UPDATES, thread_name_prefix="yt-dlp")
+
+# Opções do yt-dlp que não dependem da requisição, montadas uma única vez
+BASE_YDL_OPTS = {
+    'ffmpeg_location': FFMPEG_PATH,
+    'restrictfilenames': True,
+    'max_filesize': MAX_FILE_SIZE,
+    'cookiefile': os.getenv("COOKIES_PATH"),
+    'user_agent': os.getenv("USER_AGENT"),
+    'nocheckcertificate': True,
+    # Fragmentos HLS/DASH baixados em paralelo e retomada em conexões instáveis
+    'concurrent_fragment_downloads': int(os.getenv("YTDLP_FRAG_CONCURRENCY", "8")),
+    'http_chunk_size': 10 * 1024 * 1024,  # 10MB
+    'retries': 10,
+    'fragment_retries': 10,
+    'continuedl': True
+}
+if ARIA2C_PATH:
+    # Downloads HTTP(S) diretos pelo aria2c, que pré-aloca o arquivo inteiro com fallocate em vez de estendê-lo a
+    # cada bloco. Atenção: com o aria2c o yt-dlp não emite progresso (a mensagem de status fica parada até o fim),
+    # o http_chunk_size é ignorado e cada download abre até 16 conexões (-x16 -s16).
+    BASE_YDL_OPTS['external_downloader'] = {'http': ARIA2C_PATH}
+    BASE_YDL_OPTS['external_downloader_args'] = {'aria2c': ['--file-allocation=falloc']}
+VIDEO_FORMAT = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]'
+AUDIO_FORMAT = 'bestaudio/best'
+AUDIO_POSTPROCESSORS = [{
+    'key': 'FFmpegExtractAudio',
+    'preferredcodec': 'mp3',
+    'preferredquality': '192'
+}]
+
+# Intervalo mínimo entre edições da mensagem de progresso
+PROGRESS_EDIT_INTERVAL = 2.0  # segundos
+
+# Esquema + "://" + host, sem construir um ParseResult por mensagem
+_URL_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.\-]*://[^\s/?#]+')
+MAX_URL_LENGTH = 2048
+
+# Cache LRU (url, is_audio) -> (tipo da mídia, file_id do Telegram): pedidos repetidos reenviam sem baixar de novo
+URL_CACHE_SIZE = int(os.getenv("URL_CACHE_SIZE", "256"))
+_URL_CACHE: OrderedDict[tuple[str, bool], tuple[str, str]] = OrderedDict()
+
+# Usuários cujo diretório de download já foi criado neste processo
+_USER_DIRS: set[int] = set()
 
 class UploadError(Exception):
     pass
 
+class FloodWaitError(UploadError):
+    """Flood wait do Telegram com o tempo de espera exigido, em segundos."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Flood wait de {retry_after}s")
+        self.retry_after = retry_after
+
+# Erros de flood reconhecidos no texto da exceção (sem lower() a cada falha)
+_FLOOD_RE = re.compile(r'(flood_premium_wait)|flood_wait_(\d+)', re.I)
+
 def is_valid_url(url: str) -> bool:
-    """Valida uma URL."""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except ValueError:
-        return False
+    """Valida uma URL (exige esquema e host)."""
+    return len(url) < MAX_URL_LENGTH and bool(_URL_RE.match(url))
 
-def create_user_download_dir(user_id: int) -> str:
+async def create_user_download_dir(user_id: int) -> str:
     """Cria um diretório de download específico para o usuário."""
     user_dir = os.path.join(DOWNLOAD_DIR, str(user_id))
-    os.makedirs(user_dir, exist_ok=True)
+    if user_id not in _USER_DIRS:
+        await asyncio.to_thread(os.makedirs, user_dir, exist_ok=True)
+        _USER_DIRS.add(user_id)
     return user_dir
 
-def compute_md5(file_path: str) -> str:
-    """Calcula o hash MD5 do arquivo."""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+def remove_file(file_path: str):
+    """Remove o arquivo, ignorando se ele já não existir."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(file_path)
 
 async def upload_file_part(
         bot: Bot,
@@ -98,60 +168,87 @@ async def upload_file_part(
                 }
             )
         return True
+    except RetryAfter as e:
+        # Flood control do PTB ("Flood control exceeded. Retry in N seconds") não passa pelo _FLOOD_RE
+        raise FloodWaitError(int(e.retry_after)) from e
     except Exception as e:
-        error_msg = str(e).lower()
-        if "flood_premium_wait" in error_msg:
-            raise UploadError("Limite de upload atingido para conta regular") from e
+        match = _FLOOD_RE.search(str(e))
+        if match:
+            if match.group(1):
+                raise UploadError("Limite de upload atingido para conta regular") from e
+            raise FloodWaitError(int(match.group(2))) from e
         logger.error(f"Erro no upload da parte {part_index}: {str(e)}")
         return False
 
-async def upload_large_file(file_path: str, update: Update, context: ContextTypes.DEFAULT_TYPE, is_audio: bool) -> bool:
+async def upload_large_file(file_path: str, file_size: int, update: Update, context: ContextTypes.DEFAULT_TYPE, is_audio: bool) -> Message | None:
     """Faz o upload de arquivos grandes usando a API do Telegram."""
-    file_size = os.path.getsize(file_path)
     total_parts = (file_size + PART_SIZE - 1) // PART_SIZE
     file_id = random.getrandbits(64)
-    use_big_file = file_size > BIG_FILE_THRESHOLD
-    md5_checksum = compute_md5(file_path) if not use_big_file else None
     is_premium = False  # Implementar lógica de verificação de Premium
 
     logger.info(f"Iniciando upload de {file_path} ({total_parts} partes)")
 
+    # Um único descritor compartilhado; os.pread não altera o offset, então as leituras concorrentes dispensam lock
+    fd = os.open(file_path, os.O_RDONLY)
     try:
-        # Upload paralelo com até 4 partes simultâneas
-        semaphore = asyncio.Semaphore(4)
+        if hasattr(os, "posix_fadvise"):
+            # O arquivo acabou de ser escrito pelo yt-dlp; leitura sequencial aproveita o page cache e o readahead
+            with contextlib.suppress(OSError):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        # Upload paralelo: cada tarefa só é criada quando o semáforo libera uma vaga (até UPLOAD_CONCURRENCY)
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        loop = asyncio.get_running_loop()
+        # Flood wait vale para a conta inteira: prazo compartilhado até o qual nenhuma parte é enviada
+        flood = {"resume_at": 0.0}
 
         async def upload_part(part_index: int):
-            async with semaphore:
-                with open(file_path, 'rb') as f:
-                    f.seek(part_index * PART_SIZE)
-                    data = f.read(PART_SIZE)
-
-                for attempt in range(3):
-                    success = await upload_file_part(
-                        context.bot,
-                        file_id,
-                        part_index,
-                        data,
-                        total_parts,
-                        is_premium
-                    )
+            try:
+                # run_in_executor evita a cópia do contextvars que o to_thread faz a cada parte
+                data = await loop.run_in_executor(None, os.pread, fd, PART_SIZE, part_index * PART_SIZE)
+
+                attempt = 0
+                while attempt < 3:
+                    delay = flood["resume_at"] - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    try:
+                        success = await upload_file_part(
+                            context.bot,
+                            file_id,
+                            part_index,
+                            data,
+                            total_parts,
+                            is_premium
+                        )
+                    except FloodWaitError as e:
+                        # Espera exatamente o tempo pedido pelo Telegram, sem gastar uma tentativa
+                        flood["resume_at"] = max(flood["resume_at"], loop.time() + e.retry_after)
+                        continue
                     if success:
                         return
                     await asyncio.sleep(2 ** attempt)
+                    attempt += 1
                 raise UploadError(f"Falha no upload da parte {part_index}")
-
-        tasks = [upload_part(i) for i in range(total_parts)]
-        await asyncio.gather(*tasks)
-
-        # Constrói o objeto InputFile correto
+            finally:
+                semaphore.release()
+
+        # Em caso de falha, o TaskGroup cancela e aguarda as demais partes antes de o descritor ser fechado
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for part_index in range(total_parts):
+                    await semaphore.acquire()
+                    tg.create_task(upload_part(part_index))
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0] from eg
+
+        # Só chega aqui acima de 50MB (> BIG_FILE_THRESHOLD): sempre InputFileBig, que não exige md5_checksum
         input_file = {
-            "_": "InputFileBig" if use_big_file else "InputFile",
+            "_": "InputFileBig",
             "id": file_id,
             "parts": total_parts,
             "name": os.path.basename(file_path)
         }
-        if not use_big_file:
-            input_file["md5_checksum"] = md5_checksum
 
         # Envia a mídia usando o arquivo carregado
         media_args = {
@@ -160,74 +257,148 @@ async def upload_large_file(file_path: str, update: Update, context: ContextType
             "caption": "✅ Download concluído!"
         }
 
-        await context.bot.send_media_group(**media_args)
-        return True
+        messages = await context.bot.send_media_group(**media_args)
+        return messages[0]
 
     except UploadError as e:
         logger.error(f"Erro no upload: {str(e)}")
         await update.message.reply_text(f"❌ Erro no upload: {str(e)}")
-        return False
+        return None
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        os.close(fd)
 
-async def send_media(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str, is_audio: bool) -> bool:
-    """Gerencia o envio de mídia com fallback para upload tradicional."""
-    file_size = os.path.getsize(file_path)
+async def send_media(update: Update, context: ContextTypes.DEFAULT_TYPE, file_path: str, is_audio: bool) -> Message | None:
+    """Gerencia o envio de mídia com fallback para upload tradicional. Retorna a mensagem enviada."""
+    try:
+        file_size = os.stat(file_path).st_size
 
-    if file_size > MAX_FILE_SIZE:
-        await update.message.reply_text("⚠️ Arquivo excede o tamanho máximo permitido")
-        return False
+        if file_size > MAX_FILE_SIZE:
+            await update.message.reply_text("⚠️ Arquivo excede o tamanho máximo permitido")
+            return None
 
-    try:
         if file_size > 50 * 1024 * 1024:  # 50MB
-            return await upload_large_file(file_path, update, context, is_audio)
+            return await upload_large_file(file_path, file_size, update, context, is_audio)
 
-        with open(file_path, 'rb') as file:
+        # Buffer de 1MB: as leituras de 64KB do httpx saem do buffer, com 16x menos read() bloqueando o loop
+        with open(file_path, 'rb', buffering=STREAM_BUFFER_SIZE) as file:
+            # read_file_handle=False: o handle vai direto para o httpx, que lê em blocos em vez de carregar tudo
+            input_file = InputFile(file, filename=os.path.basename(file_path), read_file_handle=False)
             if is_audio:
-                await context.bot.send_audio(
+                return await context.bot.send_audio(
                     chat_id=update.message.chat_id,
-                    audio=file,
+                    audio=input_file,
                     title=os.path.basename(file_path)
                 )
-            else:
-                await context.bot.send_video(
-                    chat_id=update.message.chat_id,
-                    video=file,
-                    caption="✅ Download concluído!",
-                    supports_streaming=True
-                )
-        return True
+            return await context.bot.send_video(
+                chat_id=update.message.chat_id,
+                video=input_file,
+                caption="✅ Download concluído!",
+                supports_streaming=True
+            )
     except Exception as e:
         logger.error(f"Erro no envio: {str(e)}")
         await update.message.reply_text(f"❌ Erro no envio: {str(e)}")
-        return False
+        return None
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        await asyncio.to_thread(remove_file, file_path)
+
+async def send_cached_media(update: Update, context: ContextTypes.DEFAULT_TYPE, cached: tuple[str, str]) -> bool:
+    """Reenvia uma mídia já hospedada no Telegram a partir do (tipo, file_id) em cache."""
+    kind, file_id = cached
+    chat_id = update.message.chat_id
+    try:
+        # O Bot API recusa file_id de outro tipo: reenvia pelo mesmo método com que a mídia foi enviada
+        if kind == "audio":
+            await context.bot.send_audio(chat_id=chat_id, audio=file_id)
+        elif kind == "video":
+            await context.bot.send_video(
+                chat_id=chat_id,
+                video=file_id,
+                caption="✅ Download concluído!",
+                supports_streaming=True
+            )
+        else:
+            await context.bot.send_document(chat_id=chat_id, document=file_id, caption="✅ Download concluído!")
+        return True
+    except TelegramError as e:
+        logger.warning(f"file_id em cache inválido, baixando novamente: {str(e)}")
+        return False
 
-async def download_media(url: str, user_id: int, audio_only: bool = False) -> str:
+def get_cached_media(url: str, is_audio: bool) -> tuple[str, str] | None:
+    """Busca o (tipo, file_id) do Telegram de uma URL já enviada, marcando-a como usada recentemente."""
+    key = (url, is_audio)
+    cached = _URL_CACHE.get(key)
+    if cached:
+        _URL_CACHE.move_to_end(key)
+    return cached
+
+def cache_media(url: str, is_audio: bool, message: Message):
+    """Guarda o tipo e o file_id da mídia enviada, descartando a entrada menos usada quando o cache enche."""
+    for kind in ("audio", "video", "document"):
+        media = getattr(message, kind)
+        if media:
+            break
+    else:
+        return
+    _URL_CACHE[(url, is_audio)] = (kind, media.file_id)
+    _URL_CACHE.move_to_end((url, is_audio))
+    if len(_URL_CACHE) > URL_CACHE_SIZE:
+        _URL_CACHE.popitem(last=False)
+
+def create_progress_hook(queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+    """Cria um hook de progresso do yt-dlp que repassa o percentual para a fila do event loop."""
+    state = {"last_percent": -1}
+
+    def hook(d: dict):
+        if d.get("status") != "downloading":
+            return
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        if not total:
+            return
+
+        percent = int(d.get("downloaded_bytes", 0) * 100 / total)
+        if percent == state["last_percent"]:
+            return
+
+        state["last_percent"] = percent
+        # O hook roda na thread do yt-dlp: call_soon_threadsafe só agenda o put, sem Future por tick
+        loop.call_soon_threadsafe(queue.put_nowait, percent)
+
+    return hook
+
+async def report_progress(context: ContextTypes.DEFAULT_TYPE, message: Message, queue: asyncio.Queue):
+    """Consome a fila de progresso e edita a mensagem de status com o valor mais recente."""
+    while True:
+        percent = await queue.get()
+        # Descarta os valores intermediários acumulados desde a última edição
+        while not queue.empty():
+            percent = queue.get_nowait()
+
+        try:
+            await context.bot.edit_message_text(
+                text=f"⏳ Baixando... {percent}%",
+                chat_id=message.chat_id,
+                message_id=message.message_id
+            )
+        except TelegramError as e:
+            logger.warning(f"Erro ao atualizar progresso: {str(e)}")
+        await asyncio.sleep(PROGRESS_EDIT_INTERVAL)
+
+async def download_media(url: str, download_dir: str, audio_only: bool = False, progress_hook=None) -> str:
     """Faz o download de mídia usando yt-dlp."""
-    user_dir = create_user_download_dir(user_id)
     ydl_opts = {
-        'ffmpeg_location': FFMPEG_PATH,
-        'outtmpl': os.path.join(user_dir, '%(title)s.%(ext)s'),
-        'restrictfilenames': True,
-        'max_filesize': MAX_FILE_SIZE,
-        'cookiefile': os.getenv("COOKIES_PATH"),
-        'user_agent': os.getenv("USER_AGENT"),
-        'nocheckcertificate': True,
-        'format': 'bestaudio/best' if audio_only else 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192'
-        }] if audio_only else []
+        **BASE_YDL_OPTS,
+        'outtmpl': os.path.join(download_dir, '%(title)s.%(ext)s'),
+        'progress_hooks': [progress_hook] if progress_hook else [],
+        'format': AUDIO_FORMAT if audio_only else VIDEO_FORMAT,
+        'postprocessors': AUDIO_POSTPROCESSORS if audio_only else []
     }
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = await asyncio.to_thread(ydl.extract_info, url, download=True)
+            info = await asyncio.get_running_loop().run_in_executor(
+                _DOWNLOAD_EXECUTOR, functools.partial(ydl.extract_info, url, download=True)
+            )
             filename = ydl.prepare_filename(info)
             return filename if os.path.exists(filename) else None
     except Exception as e:
@@ -237,19 +408,42 @@ async def download_media(url: str, user_id: int, audio_only: bool = False) -> st
 async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE, url: str, is_audio: bool):
     """Processa uma URL recebida."""
     user = update.message.from_user
+    request_dir = None
     try:
-        await update.message.reply_text("⏳ Processando seu pedido...")
-        file_path = await download_media(url, user.id, is_audio)
+        cached = get_cached_media(url, is_audio)
+        if cached:
+            if await send_cached_media(update, context, cached):
+                return
+            _URL_CACHE.pop((url, is_audio), None)
+
+        status = await update.message.reply_text("⏳ Processando seu pedido...")
+        # Diretório temporário por pedido: downloads simultâneos da mesma URL não compartilham o mesmo arquivo,
+        # e arquivos .part/fragmentos de downloads abortados são removidos junto com ele
+        user_dir = await create_user_download_dir(user.id)
+        request_dir = await asyncio.to_thread(tempfile.mkdtemp, dir=user_dir)
+        progress_queue = asyncio.Queue()
+        hook = create_progress_hook(progress_queue, asyncio.get_running_loop())
+        progress_task = asyncio.create_task(report_progress(context, status, progress_queue))
+        try:
+            file_path = await download_media(url, request_dir, is_audio, hook)
+        finally:
+            progress_task.cancel()
 
         if not file_path:
             raise ValueError("Falha no download do arquivo")
 
-        if not await send_media(update, context, file_path, is_audio):
+        message = await send_media(update, context, file_path, is_audio)
+        if not message:
             await update.message.reply_text("❌ Falha ao enviar o arquivo")
+            return
+        cache_media(url, is_audio, message)
 
     except Exception as e:
         logger.error(f"Erro geral: {str(e)}")
         await update.message.reply_text(f"❌ Erro: {str(e)}")
+    finally:
+        if request_dir:
+            await asyncio.to_thread(shutil.rmtree, request_dir, ignore_errors=True)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler para /start."""
@@ -260,7 +454,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def audio_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler para /audio."""
-    url = ' '.join(context.args)
+    url = ' '.join(context.args).strip()
     if not is_valid_url(url):
         await update.message.reply_text("⚠️ URL inválida")
         return
@@ -268,7 +462,7 @@ async def audio_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler para mensagens com URLs."""
-    url = update.message.text
+    url = update.message.text.strip()
     if not is_valid_url(url):
         await update.message.reply_text("⚠️ URL inválida")
         return
@@ -277,8 +471,21 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 def main():
     """Inicializa o bot."""
     request = HTTPXRequest(connect_timeout=15, read_timeout=TIMEOUT_SECONDS)
-    bot = Bot(token=TOKEN, request=request)
-    app = Application.builder().bot(bot).build()
+    # Limites de envio do Telegram: ~30 mensagens/s no geral e 20 mensagens/min por grupo
+    rate_limiter = AIORateLimiter(
+        overall_max_rate=30,
+        overall_time_period=1,
+        group_max_rate=20,
+        group_time_period=60
+    )
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .request(request)
+        .rate_limiter(rate_limiter)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("audio", audio_command))